@@ -13,15 +13,25 @@ Usage:
     python main.py
 """
 
+import os
 import struct
 import time
+import hashlib
+import itertools
+import atexit
 import logging
+import queue
+from logging.handlers import QueueHandler, QueueListener
+from contextlib import asynccontextmanager
 from pathlib import Path
+from typing import Optional, Tuple, Union
 
+import orjson
 from fastapi import FastAPI, Request
-from fastapi.responses import JSONResponse, Response
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import ORJSONResponse, Response
 
-from services import stt_service
+from services import recording_service, stt_service
 
 # ============================================================
 # CONFIGURATION
@@ -30,40 +40,85 @@ from services import stt_service
 HOST = "0.0.0.0"       # Listen on all interfaces
 PORT = 8000
 AUDIO_DIR = Path("received_audio")
+SAVE_RECORDINGS = bool(os.environ.get("SAVE_RECORDINGS"))  # Debug: keep WAVs on disk
+WAV_HEADER_SIZE = 44       # Canonical PCM header (minimum valid upload)
+MAX_UPLOAD_BYTES = 25 << 20  # Whisper API's file size limit
+WORKERS = int(os.environ.get("WEB_CONCURRENCY", "4"))  # uvicorn worker processes
 
 # ============================================================
 # LOGGING
 # ============================================================
 
-logging.basicConfig(
-    level=logging.INFO,
-    format="%(asctime)s [%(levelname)s] %(message)s",
+# Handlers only enqueue records; a listener thread does the actual stderr
+# writes so logging never blocks the event loop. Each worker process gets
+# its own listener, and one handler per process keeps lines whole.
+_log_queue = queue.SimpleQueue()
+_log_output = logging.StreamHandler()
+_log_output.setFormatter(logging.Formatter(
+    "%(asctime)s [%(levelname)s] %(message)s",
     datefmt="%H:%M:%S"
-)
+))
+_log_enqueue = QueueHandler(_log_queue)
+_log_enqueue.setFormatter(logging.Formatter("%(message)s"))  # Merge args only
+logging.basicConfig(level=logging.INFO, handlers=[_log_enqueue])
+_log_listener = QueueListener(_log_queue, _log_output)
+_log_listener.start()
+atexit.register(_log_listener.stop)
+
 log = logging.getLogger("voice-hub")
 
 # ============================================================
 # APP
 # ============================================================
 
-app = FastAPI(title="Voice Satellite Hub", version="0.3.0")
-
-AUDIO_DIR.mkdir(exist_ok=True)
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Per-worker startup/shutdown."""
+    if SAVE_RECORDINGS:
+        AUDIO_DIR.mkdir(exist_ok=True)
+        recording_service.start()
+    yield
+    await recording_service.stop()
+    await stt_service.close()
+
+
+# Recording filenames: startup time + worker pid + per-process counter, so
+# recordings arriving in the same second (or on different workers) never
+# overwrite each other. next() on itertools.count is atomic under the GIL.
+_RECORDING_PREFIX = f"{int(time.time())}_{os.getpid()}"
+_recording_ids = itertools.count()
+
+app = FastAPI(
+    title="Voice Satellite Hub",
+    version="0.3.0",
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse,
+)
+# Only applies when the client sends Accept-Encoding: gzip. The ESP32's
+# HTTPClient doesn't (and can't decompress), so it still gets plain JSON.
+app.add_middleware(GZipMiddleware, minimum_size=512, compresslevel=5)
+
+
+# Service availability is fixed at startup (API key comes from the env),
+# so the health payload is serialized once. Only the bytes are shared — a
+# Response is built per request because middleware (gzip) edits its headers.
+# Rebuild it if services ever become toggleable at runtime.
+_HEALTH_BYTES = orjson.dumps({
+    "status": "ok",
+    "version": "0.3.0",
+    "phase": "cloud-stt",
+    "services": {
+        "stt": "openai-whisper" if stt_service.is_available() else "no_api_key",
+        "ai": "not_installed",
+        "tts": "not_installed",
+    }
+})
 
 
 @app.get("/api/health")
 async def health():
     """Health check endpoint."""
-    return {
-        "status": "ok",
-        "version": "0.3.0",
-        "phase": "cloud-stt",
-        "services": {
-            "stt": "openai-whisper" if stt_service.is_available() else "no_api_key",
-            "ai": "not_installed",
-            "tts": "not_installed",
-        }
-    }
+    return Response(_HEALTH_BYTES, media_type="application/json")
 
 
 @app.post("/api/voice")
@@ -80,14 +135,22 @@ async def process_voice(request: Request):
     """
     start_time = time.time()
 
-    body = await request.body()
     content_type = request.headers.get("content-type", "unknown")
+    received = await receive_audio(request)
+
+    if received is None:
+        log.warning("Audio too large (> %d bytes)", MAX_UPLOAD_BYTES)
+        return ORJSONResponse(
+            content={"error": "Audio too large"},
+            status_code=413
+        )
 
-    log.info(f"Received audio: {len(body)} bytes, content-type: {content_type}")
+    audio, digest = received
+    log.info("Received audio: %d bytes, content-type: %s", len(audio), content_type)
 
-    if len(body) < 44:
+    if len(audio) < WAV_HEADER_SIZE:
         log.warning("Audio too small (< WAV header size)")
-        return JSONResponse(
+        return ORJSONResponse(
             content={"error": "Audio too small"},
             status_code=400
         )
@@ -95,21 +158,16 @@ async def process_voice(request: Request):
     # Parse and log WAV info
     wav_info = None
     try:
-        wav_info = parse_wav_header(body)
+        wav_info = parse_wav_header(audio)
         log.info(
-            f"WAV: {wav_info['sample_rate']}Hz, "
-            f"{wav_info['bits_per_sample']}bit, "
-            f"{wav_info['channels']}ch, "
-            f"{wav_info['duration']:.1f}s"
+            "WAV: %dHz, %dbit, %dch, %.1fs",
+            wav_info["sample_rate"],
+            wav_info["bits_per_sample"],
+            wav_info["channels"],
+            wav_info["duration"],
         )
     except Exception as e:
-        log.warning(f"Could not parse WAV header: {e}")
-
-    # Save to disk for debugging
-    timestamp = int(time.time())
-    save_path = AUDIO_DIR / f"recording_{timestamp}.wav"
-    save_path.write_bytes(body)
-    log.info(f"Saved to {save_path}")
+        log.warning("Could not parse WAV header: %s", e)
 
     # ──────────────────────────────────────────────
     # PIPELINE
@@ -122,14 +180,19 @@ async def process_voice(request: Request):
     if stt_service.is_available():
         pipeline_mode = "cloud-stt"
         try:
-            transcript = await stt_service.transcribe(body)
-            log.info(f">>> TRANSCRIPT: \"{transcript}\"")
+            transcript = await stt_service.transcribe(audio, cache_key=digest)
+            log.info(">>> TRANSCRIPT: \"%s\"", transcript)
         except Exception as e:
-            log.error(f"STT failed: {e}")
+            log.error("STT failed: %s", e)
             transcript = f"[STT Error: {e}]"
     else:
         log.warning("No OPENAI_API_KEY set — running in echo mode")
 
+    # Save to disk for debugging — the writer gets the same buffer, no copy
+    if SAVE_RECORDINGS:
+        save_path = AUDIO_DIR / f"recording_{_RECORDING_PREFIX}_{next(_recording_ids)}.wav"
+        recording_service.save(save_path, audio)
+
     # Phase 4 (future): AI response
     # ai_response = await ai_service.ask(transcript)
 
@@ -137,11 +200,11 @@ async def process_voice(request: Request):
     # response_audio = await tts_service.speak(ai_response)
 
     elapsed = time.time() - start_time
-    log.info(f"Processing complete in {elapsed:.2f}s")
+    log.info("Processing complete in %.2fs", elapsed)
 
     # Return transcription as JSON
     # (Once TTS is added, this will return audio/wav instead)
-    return JSONResponse(
+    return ORJSONResponse(
         content={
             "transcript": transcript,
             "duration": wav_info["duration"] if wav_info else None,
@@ -155,18 +218,72 @@ async def process_voice(request: Request):
     )
 
 
-def parse_wav_header(data: bytes) -> dict:
-    """Parse a WAV file header and return audio properties."""
-    if data[:4] != b'RIFF' or data[8:12] != b'WAVE':
-        raise ValueError("Not a valid WAV file")
+async def receive_audio(request: Request) -> Optional[Tuple[memoryview, bytes]]:
+    """
+    Read the request body into a single buffer, hashing it on the way in.
 
-    audio_format = struct.unpack_from('<H', data, 20)[0]
-    channels = struct.unpack_from('<H', data, 22)[0]
-    sample_rate = struct.unpack_from('<I', data, 24)[0]
-    bits_per_sample = struct.unpack_from('<H', data, 34)[0]
-    data_size = struct.unpack_from('<I', data, 40)[0]
+    The body is received once and every later stage (header parse, STT
+    upload, debug save) works on views of the same buffer, so the audio
+    is never copied or re-read. Reading stops as soon as the body passes
+    MAX_UPLOAD_BYTES.
+
+    Returns:
+        (audio, digest) — a memoryview of the body and its BLAKE2b digest
+        (used to spot resent audio), or None if the body is too large
+    """
+    declared = request.headers.get("content-length", "")
+    if declared.isdigit() and int(declared) > MAX_UPLOAD_BYTES:
+        return None
+
+    body = bytearray()
+    hasher = hashlib.blake2b(digest_size=16)
+
+    async for chunk in request.stream():
+        if len(body) + len(chunk) > MAX_UPLOAD_BYTES:
+            return None
+        body += chunk
+        hasher.update(chunk)
+
+    return memoryview(body), hasher.digest()
+
+
+_CHUNK_HEADER = struct.Struct('<4sI')  # RIFF chunk id + size
+# fmt chunk body: audio format, channels, sample rate,
+# (skip byte rate + block align), bits per sample
+_FMT_FIELDS = struct.Struct('<HHI6xH')
 
-    duration = data_size / (sample_rate * channels * (bits_per_sample // 8))
+
+def parse_wav_header(data: Union[bytes, memoryview]) -> dict:
+    """
+    Parse a WAV file header and return audio properties.
+
+    Walks the RIFF chunk list for the `fmt ` and `data` chunks, so headers
+    with extra chunks (LIST, JUNK, fact) or extended fmt chunks parse too.
+    `data` only needs to cover the header, up to the data chunk's id + size.
+    """
+    mv = memoryview(data)  # Magic checks slice without copying
+    if mv[:4] != b'RIFF' or mv[8:12] != b'WAVE':
+        raise ValueError("Not a valid WAV file")
+
+    fmt = None
+    data_size = None
+    pos = 12
+    while pos + _CHUNK_HEADER.size <= len(data):
+        chunk_id, chunk_size = _CHUNK_HEADER.unpack_from(data, pos)
+        body = pos + _CHUNK_HEADER.size
+        if chunk_id == b'fmt ':
+            fmt = _FMT_FIELDS.unpack_from(data, body)
+        elif chunk_id == b'data':
+            data_size = chunk_size
+            break
+        pos = body + chunk_size + (chunk_size & 1)  # Chunks are word-aligned
+
+    if fmt is None or data_size is None:
+        raise ValueError("WAV header missing fmt or data chunk")
+
+    audio_format, channels, sample_rate, bits_per_sample = fmt
+    bytes_per_second = sample_rate * channels * (bits_per_sample // 8)
+    duration = data_size / bytes_per_second
 
     return {
         "audio_format": audio_format,
@@ -189,8 +306,19 @@ if __name__ == "__main__":
 
     log.info("=" * 50)
     log.info("  Voice Satellite Hub")
-    log.info(f"  STT: {stt_status}")
-    log.info(f"  Listening on http://{HOST}:{PORT}")
+    log.info("  STT: %s", stt_status)
+    log.info("  Listening on http://%s:%d (%d workers)", HOST, PORT, WORKERS)
     log.info("=" * 50)
 
-    uvicorn.run(app, host=HOST, port=PORT, log_level="info")
+    # uvloop + httptools (both pulled in by uvicorn[standard]) replace the
+    # pure-Python asyncio loop and h11 parser on the request path.
+    # Multiple workers require the app as an import string.
+    uvicorn.run(
+        "main:app",
+        host=HOST,
+        port=PORT,
+        workers=WORKERS,
+        loop="uvloop",
+        http="httptools",
+        log_level="info",
+    )
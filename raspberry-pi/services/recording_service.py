@@ -0,0 +1,107 @@
+"""
+Recording Service - Background WAV persistence
+
+Saves received recordings to disk from a background task so the request
+path never waits on the SD card / disk. Pending writes are drained in
+batches, and each batch is written in a single worker-thread hop.
+"""
+
+import asyncio
+import os
+import logging
+from pathlib import Path
+from typing import List, Optional, Tuple, Union
+
+log = logging.getLogger("voice-hub.recordings")
+
+QUEUE_SIZE = 64   # Pending recordings before new ones are dropped
+BATCH_SIZE = 16   # Max recordings written per worker-thread hop
+
+_queue: Optional[asyncio.Queue] = None
+_task: Optional[asyncio.Task] = None
+
+
+def start() -> None:
+    """Start the background writer (call on server startup)."""
+    global _queue, _task
+    _queue = asyncio.Queue(maxsize=QUEUE_SIZE)
+    _task = asyncio.create_task(_run())
+    _task.add_done_callback(_on_writer_done)
+
+
+async def stop() -> None:
+    """Flush pending recordings and stop the writer (call on server shutdown)."""
+    if _task is None or _task.done():
+        return  # Never started, or the writer already exited — nothing to flush
+    await _queue.put(None)
+    await _task
+
+
+def save(path: Path, data: Union[bytes, memoryview]) -> bool:
+    """
+    Queue a recording to be written to disk.
+
+    `data` is held by reference until written, so it must not be modified
+    afterwards.
+
+    Never blocks: if the writer has fallen QUEUE_SIZE recordings behind,
+    the recording is dropped rather than stalling the request.
+
+    Returns:
+        True if queued, False if dropped
+    """
+    if _queue is None:
+        raise RuntimeError("Recording writer not started")
+    if _task.done():
+        log.error("Recording writer not running, dropping %s", path)
+        return False
+    try:
+        _queue.put_nowait((path, data))
+    except asyncio.QueueFull:
+        log.warning("Recording queue full, dropping %s", path)
+        return False
+    return True
+
+
+async def _run() -> None:
+    """Drain the queue in batches until the stop sentinel arrives."""
+    while True:
+        batch = [await _queue.get()]
+        while len(batch) < BATCH_SIZE and not _queue.empty():
+            batch.append(_queue.get_nowait())
+
+        stopping = None in batch
+        pending = [item for item in batch if item is not None]
+        if pending:
+            try:
+                await asyncio.to_thread(_write_batch, pending)
+            except Exception:
+                # Lose this batch, not the writer
+                log.exception("Failed to write %d recording(s)", len(pending))
+        if stopping:
+            return
+
+
+def _on_writer_done(task: asyncio.Task) -> None:
+    """Log the writer's failure if it exits other than through stop()."""
+    if task.cancelled():
+        log.warning("Recording writer cancelled")
+    elif task.exception() is not None:
+        log.error("Recording writer crashed", exc_info=task.exception())
+
+
+def _write_batch(batch: List[Tuple[Path, Union[bytes, memoryview]]]) -> None:
+    """Write each recording with raw fd writes (no buffered-file layer)."""
+    for path, data in batch:
+        try:
+            fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+            try:
+                view = memoryview(data)
+                while view:
+                    view = view[os.write(fd, view):]
+            finally:
+                os.close(fd)
+        except OSError as e:
+            log.error("Could not save %s: %s", path, e)
+        else:
+            log.debug("Saved to %s", path)
@@ -6,7 +6,12 @@ Requires OPENAI_API_KEY environment variable.
 """
 
 import os
+import time
+import uuid
 import logging
+from collections import OrderedDict
+from typing import AsyncIterator, Optional, Union
+
 import httpx
 
 log = logging.getLogger("voice-hub.stt")
@@ -14,6 +19,19 @@ log = logging.getLogger("voice-hub.stt")
 OPENAI_API_KEY = os.environ.get("OPENAI_API_KEY", "")
 WHISPER_URL = "https://api.openai.com/v1/audio/transcriptions"
 WHISPER_MODEL = "whisper-1"
+CACHE_SIZE = 128     # Transcripts remembered for resent audio
+CACHE_TTL = 300.0    # Seconds a cached transcript stays valid
+
+# Shared client so Whisper calls reuse warm (HTTP/2) TLS connections
+# instead of handshaking with api.openai.com on every request.
+_client = httpx.AsyncClient(
+    timeout=30.0,
+    http2=True,
+    limits=httpx.Limits(max_connections=100, max_keepalive_connections=20),
+)
+
+# (audio hash, language) -> (expiry, transcript), oldest first
+_cache: "OrderedDict[tuple, tuple]" = OrderedDict()
 
 
 def is_available() -> bool:
@@ -21,13 +39,26 @@ def is_available() -> bool:
     return bool(OPENAI_API_KEY)
 
 
-async def transcribe(audio_bytes: bytes, language: str = "en") -> str:
+async def close() -> None:
+    """Close the shared HTTP client (call on server shutdown)."""
+    await _client.aclose()
+
+
+async def transcribe(
+    audio: Union[bytes, bytearray, memoryview],
+    language: str = "en",
+    cache_key: Optional[bytes] = None,
+) -> str:
     """
     Send WAV audio to OpenAI Whisper API and return transcription text.
 
     Args:
-        audio_bytes: Raw WAV file bytes (with header)
+        audio: Raw WAV file bytes or a buffer over them (with header);
+            sent into the upload without copying
         language: Language hint for Whisper (ISO 639-1 code)
+        cache_key: Hash of the audio. When given, a satellite resending the
+            same recording within CACHE_TTL gets the cached transcript
+            instead of a second Whisper call
 
     Returns:
         Transcribed text string
@@ -41,25 +72,82 @@ async def transcribe(audio_bytes: bytes, language: str = "en") -> str:
             "  export OPENAI_API_KEY='sk-...'"
         )
 
-    log.info(f"Sending {len(audio_bytes)} bytes to Whisper API (model={WHISPER_MODEL})")
-
-    async with httpx.AsyncClient(timeout=30.0) as client:
-        response = await client.post(
-            WHISPER_URL,
-            headers={"Authorization": f"Bearer {OPENAI_API_KEY}"},
-            files={"file": ("recording.wav", audio_bytes, "audio/wav")},
-            data={
-                "model": WHISPER_MODEL,
-                "language": language,
-                "response_format": "text",
-            },
-        )
+    if cache_key is not None:
+        key = (cache_key, language)
+        cached = _cache.get(key)
+        if cached is not None and cached[0] > time.monotonic():
+            _cache.move_to_end(key)
+            log.info("Transcript cache hit, skipping Whisper API")
+            return cached[1]
+
+    boundary = uuid.uuid4().hex
+    head, tail = _multipart_envelope(boundary, language)
+    audio_size = memoryview(audio).nbytes
+
+    log.info("Sending %d bytes to Whisper API (model=%s)", audio_size, WHISPER_MODEL)
+
+    response = await _client.post(
+        WHISPER_URL,
+        headers={
+            "Authorization": f"Bearer {OPENAI_API_KEY}",
+            "Accept": "text/plain",
+            "Content-Type": f"multipart/form-data; boundary={boundary}",
+            "Content-Length": str(len(head) + audio_size + len(tail)),
+        },
+        content=_multipart_body(head, audio, tail),
+    )
 
     if response.status_code != 200:
         error_detail = response.text[:500]
-        log.error(f"Whisper API error {response.status_code}: {error_detail}")
+        log.error("Whisper API error %d: %s", response.status_code, error_detail)
         raise RuntimeError(f"Whisper API returned {response.status_code}: {error_detail}")
 
-    transcript = response.text.strip()
-    log.info(f"Transcription: \"{transcript}\"")
+    # response_format=text is a small UTF-8 body: strip the bytes and decode
+    # once rather than going through httpx's charset-detecting .text
+    transcript = response.content.strip().decode("utf-8")
+    log.debug("Transcription: \"%s\"", transcript)
+
+    if cache_key is not None:
+        _cache[key] = (time.monotonic() + CACHE_TTL, transcript)
+        _cache.move_to_end(key)
+        if len(_cache) > CACHE_SIZE:
+            _cache.popitem(last=False)
     return transcript
+
+
+def _multipart_envelope(boundary: str, language: str) -> tuple:
+    """
+    Build the multipart/form-data bytes that surround the audio.
+
+    Returns:
+        (head, tail) — the form fields plus the file part's headers, and
+        the closing boundary
+    """
+    fields = {
+        "model": WHISPER_MODEL,
+        "language": language,
+        "response_format": "text",
+    }
+    parts = [
+        f'--{boundary}\r\n'
+        f'Content-Disposition: form-data; name="{name}"\r\n\r\n'
+        f'{value}\r\n'
+        for name, value in fields.items()
+    ]
+    parts.append(
+        f'--{boundary}\r\n'
+        f'Content-Disposition: form-data; name="file"; filename="recording.wav"\r\n'
+        f'Content-Type: audio/wav\r\n\r\n'
+    )
+    head = "".join(parts).encode()
+    tail = f'\r\n--{boundary}--\r\n'.encode()
+    return head, tail
+
+
+async def _multipart_body(
+    head: bytes, audio: Union[bytes, bytearray, memoryview], tail: bytes
+) -> AsyncIterator[bytes]:
+    """Yield the multipart body without copying the audio into a new buffer."""
+    yield head
+    yield audio
+    yield tail